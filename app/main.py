@@ -1,17 +1,22 @@
 # Imports.
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional, Tuple
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 import sqlite3, os, unicodedata, re
+from urllib.parse import quote
+from functools import lru_cache
 import threading
-from queue import Queue, Full
-from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from queue import Empty, LifoQueue, SimpleQueue
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from cachetools import TTLCache
 
 # Logging.
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
 import time
 
@@ -20,50 +25,344 @@ MAX_SPECIES_COUNT = int(os.environ.get("POKEDEX_MAX_SPECIES", "1998"))
 DB_PATH = os.environ.get("DB_PATH", "/data/pokedex.db")
 DB_TIMEOUT = float(os.environ.get("POKEDEX_DB_TIMEOUT_SEC", "30"))
 DB_BUSY_TIMEOUT_MS = int(os.environ.get("POKEDEX_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.environ.get("POKEDEX_DB_CACHE_SIZE_KB", "64000"))
+DB_MMAP_SIZE = int(os.environ.get("POKEDEX_DB_MMAP_SIZE", "268435456"))
+READ_POOL_SIZE = max(1, int(os.environ.get("POKEDEX_READ_POOL_SIZE", str(os.cpu_count() or 4))))
+READ_POOL_TIMEOUT = float(os.environ.get("POKEDEX_READ_POOL_TIMEOUT_SEC", "10"))
 CAPTURE_QUEUE_MAXSIZE = int(os.environ.get("POKEDEX_CAPTURE_QUEUE_MAXSIZE", "500"))
-CAPTURE_WORKERS = int(os.environ.get("POKEDEX_CAPTURE_WORKERS", "1"))
 CAPTURE_PROCESS_TIMEOUT = float(os.environ.get("POKEDEX_CAPTURE_PROCESS_TIMEOUT_SEC", "60"))
+CAPTURE_BATCH_SIZE = max(1, int(os.environ.get("POKEDEX_CAPTURE_BATCH_SIZE", "64")))
+CAPTURE_BULK_MAX_ITEMS = int(os.environ.get("POKEDEX_CAPTURE_BULK_MAX_ITEMS", "2000"))
+CAPTURE_CACHE_PLAYERS = int(os.environ.get("POKEDEX_CAPTURE_CACHE_PLAYERS", "10000"))
+CAPTURE_CACHE_TTL = float(os.environ.get("POKEDEX_CAPTURE_CACHE_TTL_SEC", "300"))
 REGISTER_QUEUE_MAXSIZE = int(os.environ.get("POKEDEX_REGISTER_QUEUE_MAXSIZE", "500"))
-REGISTER_WORKERS = int(os.environ.get("POKEDEX_REGISTER_WORKERS", "1"))
 REGISTER_PROCESS_TIMEOUT = float(os.environ.get("POKEDEX_REGISTER_PROCESS_TIMEOUT_SEC", "60"))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get("POKEDEX_SHUTDOWN_DRAIN_TIMEOUT_SEC", "10"))
 CAPTURE_IMMEDIATE_ACK = os.environ.get("POKEDEX_CAPTURE_IMMEDIATE_ACK", "false").strip().lower() in ("1", "true", "yes", "on")
 REGISTER_IMMEDIATE_ACK = os.environ.get("POKEDEX_REGISTER_IMMEDIATE_ACK", "true").strip().lower() in ("1", "true", "yes", "on")
 MAX_NAME_LEN = 64
+SAFE_NAME_CACHE_MAX_LEN = 256
 SAFE_CHARS_RE = re.compile(r"[^0-9A-Za-z\u00C0-\uFFFF \-_.()!@#\$%&\+\=,:;]")
-WRITE_LOCK = threading.Lock()
-CAPTURE_QUEUE: Queue[Tuple[object, Future]] = Queue(maxsize=CAPTURE_QUEUE_MAXSIZE)
-REGISTER_QUEUE: Queue[Tuple[object, Future]] = Queue(maxsize=REGISTER_QUEUE_MAXSIZE)
-_capture_workers_started: bool = False
-_register_workers_started: bool = False
+# Mega and Gmax forms aren't tracked; only the 5-character prefix is case-folded for the check.
+UNTRACKED_PREFIXES = frozenset({"mega ", "gmax "})
+_ASCII_CONTROLS = dict.fromkeys([*range(0x20), 0x7F])
+_WS_RE = re.compile(r"\s+")
+# SAFE_CHARS_RE as a translate table for U+0000..U+00FF; above that only astral
+# code points (> U+FFFF) are unsafe, and those still go through the regex.
+_UNSAFE_LATIN1 = dict.fromkeys(cp for cp in range(0x100) if SAFE_CHARS_RE.match(chr(cp)))
+# Every write runs on this one thread, which serializes them the way SQLite needs;
+# write_conn() still takes _WRITE_CONN_LOCK so other callers (shutdown, tooling)
+# can't share the connection mid-transaction. The queues are drained by tasks on the event loop.
+WRITER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+CAPTURE_QUEUE: asyncio.Queue[Tuple[object, Optional[asyncio.Future]]] = asyncio.Queue(maxsize=CAPTURE_QUEUE_MAXSIZE)
+REGISTER_QUEUE: asyncio.Queue[Tuple[object, Optional[asyncio.Future]]] = asyncio.Queue(maxsize=REGISTER_QUEUE_MAXSIZE)
+_write_tasks: list = []
+# Read handlers run here, sized to the read pool; every read releases its connection before
+# returning, so a checkout only waits on other queries, and read_conn() bounds even that.
+READ_EXECUTOR = ThreadPoolExecutor(max_workers=READ_POOL_SIZE, thread_name_prefix="sqlite-reader")
+
+# Known steam_id -> {pokemon_name: shiny state}, so repeat submissions of a capture the
+# player already has are answered without touching SQLite. Updated only after commits;
+# a player's entry is dropped when they register anew (e.g. after an admin delete), and
+# the TTL bounds staleness from any other out-of-band edit. The event loop only ever
+# tries the lock, so a busy writer can't stall it.
+CAPTURE_CACHE: TTLCache[str, Dict[str, int]] = TTLCache(maxsize=CAPTURE_CACHE_PLAYERS, ttl=CAPTURE_CACHE_TTL)
+CAPTURE_CACHE_LOCK = threading.Lock()
+DUPLICATE_CAPTURE_BODY = {
+    "ok": True,
+    "inserted": False,
+    "shiny_upgraded": False,
+    "first_overall": False,
+    "first_shiny": False,
+}
+
+# Process-wide connection pool: READ_POOL_SIZE read-only connections shared by the read
+# handlers plus the single write connection, all opened once at startup so PRAGMAs and
+# page caches survive across requests. LIFO hands out the most recently used (warmest) one.
+_READ_POOL: LifoQueue = LifoQueue()
+_WRITE_CONN: Optional[sqlite3.Connection] = None
+_WRITE_CONN_LOCK = threading.Lock()
+_POOL_LOCK = threading.Lock()
+_POOL_STATS = {"readonly": 0, "readwrite": 0, "checkouts": 0}
+
+# UTC "now" computed by SQLite, in the same +00:00 ISO shape as the stored timestamps
+# (millisecond precision). 'now' is fixed for the duration of one statement.
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+# SQL statements, kept as constants so each pooled connection's statement cache
+# keys on stable text and reuses the prepared statement.
+# Inserts or refreshes a player in one statement. updated_at only moves when the name
+# changes, so a login heartbeat just bumps last_seen_at; a fresh insert is the only case
+# where created_at and last_seen_at come from the same call.
+SQL_REGISTER_UPSERT = """
+    INSERT INTO players(steam_id, steam_name, steam_name_raw, steam_name_safe,
+                        created_at, updated_at, last_seen_at)
+    VALUES(?,?,?,?,?,?,?)
+    ON CONFLICT(steam_id) DO UPDATE SET
+        steam_name=excluded.steam_name,
+        steam_name_raw=excluded.steam_name_raw,
+        steam_name_safe=excluded.steam_name_safe,
+        updated_at=CASE
+            WHEN players.steam_name IS excluded.steam_name THEN players.updated_at
+            ELSE excluded.updated_at
+        END,
+        last_seen_at=excluded.last_seen_at
+    RETURNING (created_at = last_seen_at) AS created
+"""
+SQL_PLAYER_EXISTS = "SELECT 1 FROM players WHERE steam_id=?"
+SQL_CAPTURE_EXISTS = "SELECT shiny FROM captures WHERE steam_id=? AND pokemon_name=?"
+# Both answered from index pages alone (idx_captures_pokemon_shiny_steam / idx_captures_shiny_only);
+# COUNT(*) equals the player count because (steam_id, pokemon_name) is unique.
+SQL_SPECIES_PLAYER_COUNT = "SELECT COUNT(*) FROM captures WHERE pokemon_name=?"
+SQL_SPECIES_SHINY_COUNT = "SELECT COUNT(*) FROM captures WHERE pokemon_name=? AND shiny=1"
+# Inserts a new capture or upgrades an existing non-shiny row to shiny in one statement.
+# A client-supplied captured_at wins; otherwise SQLite stamps the row.
+SQL_CAPTURE_UPSERT = f"""
+    INSERT INTO captures(steam_id, pokemon_name, shiny, captured_at)
+    VALUES(?,?,?,COALESCE(?, {SQL_NOW}))
+    ON CONFLICT(steam_id, pokemon_name) DO UPDATE SET shiny = 1
+    WHERE captures.shiny = 0 AND excluded.shiny = 1
+"""
+SQL_CAPTURE_DELETE = "DELETE FROM captures WHERE steam_id = ? AND pokemon_name = ? RETURNING shiny"
+SQL_TOTALS_INIT = "INSERT OR IGNORE INTO player_totals(steam_id, name_key) VALUES(?,?)"
+# Applies signed deltas to a player's cached totals.
+SQL_TOTALS_ADD = """
+    INSERT INTO player_totals(steam_id, total, shinies, unique_species)
+    VALUES(?,?,?,?)
+    ON CONFLICT(steam_id) DO UPDATE SET
+        total=total + excluded.total,
+        shinies=shinies + excluded.shinies,
+        unique_species=unique_species + excluded.unique_species
+"""
+# Recomputes one player's totals from their captures (used after bulk imports).
+SQL_TOTALS_REFRESH = """
+    INSERT INTO player_totals(steam_id, total, shinies, unique_species, name_key)
+    SELECT p.steam_id,
+           COUNT(c.id),
+           COALESCE(SUM(CASE WHEN c.shiny = 1 THEN 1 ELSE 0 END), 0),
+           -- (steam_id, pokemon_name) is unique, so a plain count needs no DISTINCT sort.
+           COUNT(CASE
+                   WHEN c.pokemon_name NOT LIKE 'Mega %' AND c.pokemon_name NOT LIKE 'Gmax %'
+                   THEN 1
+                 END),
+           COALESCE(p.steam_name_safe, p.steam_name, 'Unknown')
+    FROM players p
+    LEFT JOIN captures c ON p.steam_id = c.steam_id
+    WHERE p.steam_id = ?
+    GROUP BY p.steam_id
+    ON CONFLICT(steam_id) DO UPDATE SET
+        total=excluded.total,
+        shinies=excluded.shinies,
+        unique_species=excluded.unique_species
+"""
+SQL_PLAYER_NAMES = "SELECT steam_name, steam_name_safe FROM players WHERE steam_id=?"
+SQL_PLAYER_CAPTURES = """
+    SELECT pokemon_name, shiny, captured_at
+    FROM captures WHERE steam_id=?
+    ORDER BY pokemon_name COLLATE NOCASE
+"""
+SQL_LEADERBOARD = """
+    SELECT p.steam_id, p.steam_name, p.steam_name_safe, t.total, t.shinies
+    FROM player_totals t
+    JOIN players p ON p.steam_id = t.steam_id
+    ORDER BY t.total DESC, t.shinies DESC, p.steam_name COLLATE NOCASE
+    LIMIT ?
+"""
+SQL_PLAYER_SEARCH = """
+    SELECT p.steam_id,
+           p.steam_name,
+           p.steam_name_safe,
+           t.total,
+           t.shinies
+    FROM players p
+    JOIN player_totals t ON t.steam_id = p.steam_id
+    WHERE p.steam_id = ?
+       OR p.steam_name_safe LIKE ?
+    ORDER BY t.total DESC, t.shinies DESC, p.steam_name COLLATE NOCASE
+    LIMIT 1
+"""
+# Answered by a range scan of idx_player_totals_rank_name; name_key is the
+# denormalized tiebreak name, so no join back to players is needed.
+SQL_PLAYER_RANK = """
+    SELECT 1 + COUNT(*) AS rank
+    FROM player_totals
+    WHERE total > ?
+       OR (total = ? AND shinies > ?)
+       OR (total = ? AND shinies = ? AND name_key COLLATE NOCASE < ?)
+"""
+SQL_SPECIES_FIRST_CAPTURE = """
+    SELECT
+      c.steam_id,
+      p.steam_name,
+      p.steam_name_safe,
+      c.captured_at
+    FROM captures c
+    JOIN players p ON p.steam_id = c.steam_id
+    WHERE c.pokemon_name = ?
+    ORDER BY c.captured_at ASC
+    LIMIT 1
+"""
+SQL_SPECIES_SEARCH = """
+    SELECT DISTINCT pokemon_name
+    FROM captures
+    WHERE pokemon_name LIKE ?
+    ORDER BY pokemon_name COLLATE NOCASE
+    LIMIT ?
+"""
+SQL_LEADERBOARD_COMPLETION = """
+    SELECT p.steam_id,
+           p.steam_name,
+           p.steam_name_safe,
+           t.unique_species
+    FROM player_totals t
+    JOIN players p ON p.steam_id = t.steam_id
+    WHERE t.unique_species > 0
+    ORDER BY t.unique_species DESC, p.steam_name COLLATE NOCASE
+    LIMIT ?
+"""
+
+# Column names for the tuple rows returned by the read-only connections.
+CAPTURE_COLUMNS = ("pokemon_name", "shiny", "captured_at")
+LEADERBOARD_COLUMNS = ("steam_id", "steam_name", "steam_name_safe", "total", "shinies")
+COMPLETION_COLUMNS = ("steam_id", "steam_name", "steam_name_safe", "unique_species")
+
+@lru_cache(maxsize=1)
+def _control_chars_table():
+    """Every Cc/Cf code point as a str.translate deletion table, built on first use."""
+    return dict.fromkeys(
+        cp for cp in range(0x110000) if unicodedata.category(chr(cp)) in ("Cc", "Cf")
+    )
 
 def make_safe_name(name: Optional[str]) -> str:
     if not name:
         return "Unknown"
-    n = unicodedata.normalize("NFC", name)
-    n = "".join(ch for ch in n if unicodedata.category(ch) not in ("Cc","Cf"))
-    n = re.sub(r"\s+", " ", n).strip()
-    n = SAFE_CHARS_RE.sub("", n)
+    # Only memoize names of a sane length so clients can't pin huge strings as cache keys.
+    if len(name) <= SAFE_NAME_CACHE_MAX_LEN:
+        return _sanitize_name_cached(name)
+    return _sanitize_name(name)
+
+def _sanitize_name(name: str) -> str:
+    if name.isascii():
+        # ASCII is already NFC and its only Cc/Cf characters are C0 and DEL, which leaves
+        # the plain space as the only whitespace to collapse.
+        n = " ".join(name.translate(_ASCII_CONTROLS).split())
+    else:
+        n = name if unicodedata.is_normalized("NFC", name) else unicodedata.normalize("NFC", name)
+        n = _WS_RE.sub(" ", n.translate(_control_chars_table())).strip()
+    n = n.translate(_UNSAFE_LATIN1)
+    if not n.isascii() and max(n) > "\uffff":
+        n = SAFE_CHARS_RE.sub("", n)
     if len(n) > MAX_NAME_LEN:
         n = n[:MAX_NAME_LEN].rstrip()
     return n or "Unknown"
 
-def db():
-    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT)
-    conn.row_factory = sqlite3.Row
+_sanitize_name_cached = lru_cache(maxsize=4096)(_sanitize_name)
+
+def _open_conn(readonly: bool = False):
+    if readonly:
+        # Read-only handles skip write-lock bookkeeping and, under WAL, never contend
+        # with the writer. They work on plain tuples (see the *_COLUMNS tuples).
+        conn = sqlite3.connect(
+            f"file:{quote(DB_PATH)}?mode=ro",
+            uri=True,
+            timeout=DB_TIMEOUT,
+            cached_statements=256,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA query_only=1")
+    else:
+        conn = sqlite3.connect(
+            DB_PATH, timeout=DB_TIMEOUT, cached_statements=256, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    # Tune every connection once at open; pooled connections keep these settings.
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
     # Give SQLite more time to wait on locks during bursts of writes.
     conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    # Enforce captures.steam_id -> players.steam_id; SQLite leaves this off per connection.
+    conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
+def open_pool():
+    """Open the write connection and fill the read pool; call after init_db()."""
+    global _WRITE_CONN
+    with _WRITE_CONN_LOCK:
+        if _WRITE_CONN is not None:
+            return
+        _WRITE_CONN = _open_conn()
+        for _ in range(READ_POOL_SIZE):
+            _READ_POOL.put(_open_conn(readonly=True))
+    with _POOL_LOCK:
+        _POOL_STATS["readwrite"] = 1
+        _POOL_STATS["readonly"] = READ_POOL_SIZE
+
+def close_pool():
+    """Run PRAGMA optimize on the write connection, then close every pooled connection."""
+    global _WRITE_CONN
+    with _WRITE_CONN_LOCK:
+        if _WRITE_CONN is None:
+            return
+        # Re-analyzes only the tables whose statistics drifted since they were last gathered.
+        try:
+            _WRITE_CONN.execute("PRAGMA optimize;")
+        except sqlite3.Error:
+            pokedex_logger.exception("PRAGMA optimize failed")
+        _WRITE_CONN.close()
+        _WRITE_CONN = None
+        while True:
+            try:
+                _READ_POOL.get_nowait().close()
+            except Empty:
+                break
+    with _POOL_LOCK:
+        _POOL_STATS["readwrite"] = 0
+        _POOL_STATS["readonly"] = 0
+
+def _count_checkout():
+    with _POOL_LOCK:
+        _POOL_STATS["checkouts"] += 1
+
+@contextmanager
+def read_conn():
+    """Borrow a read-only connection from the pool, waiting up to READ_POOL_TIMEOUT if they are all in use."""
+    try:
+        conn = _READ_POOL.get(timeout=READ_POOL_TIMEOUT)
+    except Empty:
+        raise HTTPException(status_code=503, detail="Database is busy; please retry.")
+    _count_checkout()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        _READ_POOL.put(conn)
+
+@contextmanager
+def write_conn():
+    """Hold the single write connection; rolls back anything left uncommitted."""
+    with _WRITE_CONN_LOCK:
+        if _WRITE_CONN is None:
+            raise RuntimeError("The write connection is closed")
+        _count_checkout()
+        try:
+            yield _WRITE_CONN
+        finally:
+            if _WRITE_CONN.in_transaction:
+                _WRITE_CONN.rollback()
+
 def init_db():
-    conn = db()
+    conn = _open_conn()
     cur = conn.cursor()
 
-    # Enable WAL to improve concurrent read/write behavior.
-    cur.execute("PRAGMA journal_mode=WAL;")
-    cur.execute("PRAGMA synchronous=NORMAL;")
-
     pokedex_logger.info("Initialized DB")
 
+    # Run all the DDL and backfills as one transaction: one commit, all or nothing.
+    cur.execute("BEGIN")
+
     # Players table.
     cur.execute("""
     CREATE TABLE IF NOT EXISTS players(
@@ -89,9 +388,22 @@ def init_db():
     );
     """)
 
-    # Helpful non-unique indexes.
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_captures_pokemon ON captures(pokemon_name);")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_captures_steam ON captures(steam_id);")
+    # Superseded by the covering indexes below (and the unique index, which leads with steam_id).
+    cur.execute("DROP INDEX IF EXISTS idx_captures_pokemon;")
+    cur.execute("DROP INDEX IF EXISTS idx_captures_steam;")
+
+    # Covering index for a player's dex, already in its NOCASE display order.
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_captures_steam_cover
+    ON captures(steam_id, pokemon_name COLLATE NOCASE, shiny, captured_at);
+    """)
+
+    # Covering indexes for per-species aggregates.
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_captures_pokemon_shiny_steam
+    ON captures(pokemon_name, shiny, steam_id);
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_captures_shiny_only ON captures(pokemon_name) WHERE shiny=1;")
 
     # Enforce one row per (steam_id, pokemon_name).
     cur.execute("""
@@ -99,6 +411,75 @@ def init_db():
     ON captures(steam_id, pokemon_name);
     """)
 
+    # Per-player totals, maintained incrementally by the write paths so the
+    # leaderboards don't have to aggregate every capture on each read.
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS player_totals(
+      steam_id TEXT PRIMARY KEY,
+      total INTEGER NOT NULL DEFAULT 0,
+      shinies INTEGER NOT NULL DEFAULT 0,
+      unique_species INTEGER NOT NULL DEFAULT 0,
+      name_key TEXT
+    );
+    """)
+    # Databases created before name_key was denormalized into player_totals.
+    if "name_key" not in {r[1] for r in cur.execute("PRAGMA table_info(player_totals)")}:
+        cur.execute("ALTER TABLE player_totals ADD COLUMN name_key TEXT;")
+    cur.execute("DROP INDEX IF EXISTS idx_player_totals_rank;")
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_player_totals_rank_name
+    ON player_totals(total DESC, shinies DESC, name_key COLLATE NOCASE);
+    """)
+
+    # Completion leaderboard: walk players with any species in descending order.
+    cur.execute("""
+    CREATE INDEX IF NOT EXISTS idx_player_totals_completion
+    ON player_totals(unique_species DESC) WHERE unique_species > 0;
+    """)
+
+    # Keep name_key in step with renames, including ones made directly in the DB.
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_players_name_key
+    AFTER UPDATE OF steam_name, steam_name_safe ON players
+    WHEN COALESCE(NEW.steam_name_safe, NEW.steam_name, 'Unknown')
+         IS NOT COALESCE(OLD.steam_name_safe, OLD.steam_name, 'Unknown')
+    BEGIN
+      UPDATE player_totals
+      SET name_key = COALESCE(NEW.steam_name_safe, NEW.steam_name, 'Unknown')
+      WHERE steam_id = NEW.steam_id;
+    END;
+    """)
+
+    # Backfill totals for any player that doesn't have a row yet (e.g. existing databases).
+    cur.execute("""
+    INSERT OR IGNORE INTO player_totals(steam_id, total, shinies, unique_species, name_key)
+    SELECT p.steam_id,
+           COUNT(c.id),
+           SUM(CASE WHEN c.shiny = 1 THEN 1 ELSE 0 END),
+           -- (steam_id, pokemon_name) is unique, so a plain count needs no DISTINCT sort.
+           COUNT(CASE
+                   WHEN c.pokemon_name NOT LIKE 'Mega %' AND c.pokemon_name NOT LIKE 'Gmax %'
+                   THEN 1
+                 END),
+           COALESCE(p.steam_name_safe, p.steam_name, 'Unknown')
+    FROM players p
+    LEFT JOIN captures c ON p.steam_id = c.steam_id
+    GROUP BY p.steam_id;
+    """)
+    cur.execute("""
+    UPDATE player_totals
+    SET name_key = (
+      SELECT COALESCE(p.steam_name_safe, p.steam_name, 'Unknown')
+      FROM players p WHERE p.steam_id = player_totals.steam_id
+    )
+    WHERE name_key IS NULL;
+    """)
+
+    # Refresh planner statistics so the covering indexes get picked; the limit keeps
+    # startup quick on large databases.
+    cur.execute("PRAGMA analysis_limit=1000;")
+    cur.execute("ANALYZE;")
+
     conn.commit()
     conn.close()
 
@@ -107,6 +488,8 @@ LOG_DIR = "/var/log/pmtu-pokedex"
 LOG_PATH = os.path.join(LOG_DIR, "pokedex.log")
 ADMIN_LOG_PATH = os.path.join(LOG_DIR, "admin_audit.log")
 ADMIN_USER_AGENT = os.environ.get("POKEDEX_ADMIN_UA", "PMTU-Pokedex-Admin")
+# Compared against the raw header bytes, so non-admin requests never build a lowered str.
+ADMIN_UA_BYTES = ADMIN_USER_AGENT.strip().lower().encode()
 
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -129,10 +512,17 @@ stream_handler.setFormatter(logging.Formatter(
     "%(asctime)s [%(levelname)s] %(message)s",
 ))
 
+# Request threads only enqueue records; a background listener does the file and stdout I/O.
+log_queue: SimpleQueue = SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+
+# Listeners are started by the app's startup hook and stopped (flushing the queue) on shutdown.
+_log_listeners: list = []
+
 # Avoid adding handlers twice if app reloads
 if not pokedex_logger.handlers:
-    pokedex_logger.addHandler(file_handler)
-    pokedex_logger.addHandler(stream_handler)
+    pokedex_logger.addHandler(QueueHandler(log_queue))
+    _log_listeners.append(log_listener)
 
 # Dedicated audit logger for admin UA detection.
 admin_audit_logger = logging.getLogger("pmtu_pokedex_admin_audit")
@@ -146,204 +536,278 @@ if not admin_audit_logger.handlers:
     admin_handler.setFormatter(logging.Formatter(
         "%(asctime)s [%(levelname)s] %(message)s",
     ))
-    admin_audit_logger.addHandler(admin_handler)
+    admin_log_queue: SimpleQueue = SimpleQueue()
+    admin_audit_logger.addHandler(QueueHandler(admin_log_queue))
+    _log_listeners.append(QueueListener(admin_log_queue, admin_handler, respect_handler_level=True))
 
 # Create the app.
-app = FastAPI(title="PMTU Global Pokedex", root_path="/api")
+app = FastAPI(title="PMTU Global Pokedex", root_path="/api", default_response_class=ORJSONResponse)
 
 @app.on_event("startup")
-def startup():
+async def startup():
+    for listener in _log_listeners:
+        listener.start()
     os.makedirs("/data", exist_ok=True)
     init_db()
-    _start_register_workers()
-    _start_capture_workers()
+    open_pool()
+    _start_write_workers()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Let the workers write out what has already been acknowledged, then stop them.
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(REGISTER_QUEUE.join(), CAPTURE_QUEUE.join()), SHUTDOWN_DRAIN_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        pokedex_logger.warning(
+            "Shutting down with %d register and %d capture writes still queued",
+            REGISTER_QUEUE.qsize(),
+            CAPTURE_QUEUE.qsize(),
+        )
+    for task in _write_tasks:
+        task.cancel()
+    await asyncio.gather(*_write_tasks, return_exceptions=True)
+    _write_tasks.clear()
+
+    # Queue behind any write still on the writer thread before closing the connections;
+    # anything that reaches write_conn() afterwards gets a clear error.
+    await asyncio.get_running_loop().run_in_executor(WRITER_EXECUTOR, close_pool)
+    for listener in _log_listeners:
+        listener.stop()
+
+# Request models are immutable once validated; nothing reassigns their fields.
+REQUEST_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True, validate_assignment=False)
 
 class RegisterReq(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     steam_id: str = Field(..., min_length=3, max_length=64)
     steam_name: Optional[str] = None
 
 class CaptureReq(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     steam_id: str
     pokemon_name: str = Field(..., min_length=1, max_length=64)
     shiny: Optional[bool] = False
     captured_at: Optional[str] = None
 
+class CaptureBulkReq(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
+    captures: List[CaptureReq] = Field(..., min_length=1, max_length=CAPTURE_BULK_MAX_ITEMS)
 
-def _start_register_workers():
-    """Spin up background worker threads to process register writes."""
-    global _register_workers_started
-    if _register_workers_started:
+def _start_write_workers():
+    """Start the tasks that feed queued register and capture writes to the writer thread."""
+    if _write_tasks:
         return
 
-    worker_count = max(1, REGISTER_WORKERS)
-    for idx in range(worker_count):
-        t = threading.Thread(
-            target=_register_worker,
-            name=f"register-worker-{idx+1}",
-            daemon=True,
-        )
-        t.start()
-    _register_workers_started = True
+    # Keep references so the tasks aren't garbage collected while idle.
+    _write_tasks.append(asyncio.create_task(_register_worker(), name="register-worker"))
+    _write_tasks.append(asyncio.create_task(_capture_worker(), name="capture-worker"))
 
 
-def _start_capture_workers():
-    """Spin up background worker threads to process capture writes."""
-    global _capture_workers_started
-    if _capture_workers_started:
+def _settle(fut: Optional[asyncio.Future], result=None, exc: Optional[BaseException] = None):
+    """Resolve a queued request's future, unless it was acked early or its waiter gave up."""
+    if fut is None:
+        # Acked early, so nobody is waiting; don't let a failed write vanish silently.
+        if exc is not None:
+            pokedex_logger.error("Queued write failed after it was acknowledged: %r", exc)
         return
-
-    worker_count = max(1, CAPTURE_WORKERS)
-    for idx in range(worker_count):
-        t = threading.Thread(
-            target=_capture_worker,
-            name=f"capture-worker-{idx+1}",
-            daemon=True,
-        )
-        t.start()
-    _capture_workers_started = True
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
 
 
-def _register_worker():
+async def _register_worker():
+    loop = asyncio.get_running_loop()
     while True:
-        req, fut = REGISTER_QUEUE.get()
+        req, fut = await REGISTER_QUEUE.get()
         try:
-            body, status = _process_register(req)
-            fut.set_result((body, status))
+            _settle(fut, await loop.run_in_executor(WRITER_EXECUTOR, _process_register, req))
         except Exception as exc:
-            fut.set_exception(exc)
+            _settle(fut, exc=exc)
         finally:
             REGISTER_QUEUE.task_done()
 
 
 def _process_register(req: RegisterReq):
-    pokedex_logger.info(f"Registering {req.steam_name} ({req.steam_id})")
+    pokedex_logger.info("Registering %s (%s)", req.steam_name, req.steam_id)
 
+    # Stamped in Python: the created flag compares created_at with last_seen_at, which needs
+    # microsecond resolution (SQLite's 'now' only has milliseconds).
     now = datetime.now(timezone.utc).isoformat()
+    # Sanitize before taking the write lock; make_safe_name is memoized, so an unchanged
+    # name is a cache hit.
     safe = make_safe_name(req.steam_name)
-    with WRITE_LOCK:
-        conn = db(); cur = conn.cursor()
-        cur.execute("SELECT steam_id FROM players WHERE steam_id=?", (req.steam_id,))
-        exists = cur.fetchone() is not None
-        if exists:
-            cur.execute("""
-                UPDATE players
-                SET steam_name=?, steam_name_raw=?, steam_name_safe=?,
-                    updated_at=?, last_seen_at=?
-                WHERE steam_id=?""",
-                (req.steam_name, req.steam_name, safe, now, now, req.steam_id))
-        else:
-            cur.execute("""
-                INSERT INTO players(steam_id, steam_name, steam_name_raw, steam_name_safe,
-                                    created_at, updated_at, last_seen_at)
-                VALUES(?,?,?,?,?,?,?)""",
-                (req.steam_id, req.steam_name, req.steam_name, safe, now, now, now))
+    with write_conn() as conn:
+        # One UPSERT inside an immediate transaction; the returned flag tells insert from update.
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            SQL_REGISTER_UPSERT,
+            (req.steam_id, req.steam_name, req.steam_name, safe, now, now, now),
+        )
+        created = bool(cur.fetchone()["created"])
+        if created:
+            conn.execute(SQL_TOTALS_INIT, (req.steam_id, safe))
         conn.commit()
-        conn.close()
 
-    status = 201 if not exists else 200
+    if created:
+        # A fresh row may follow an admin delete; drop any cached captures from the old one
+        # so they can't answer new submissions as duplicates.
+        with CAPTURE_CACHE_LOCK:
+            CAPTURE_CACHE.pop(req.steam_id, None)
+
+    status = 201 if created else 200
     return {
         "ok": True,
         "steam_id": req.steam_id,
         "steam_name": req.steam_name,
         "steam_name_safe": safe,
-        "created": not exists,
-        "updated": exists,
+        "created": created,
+        "updated": not created,
     }, status
 
 
-def _capture_worker():
+async def _capture_worker():
+    loop = asyncio.get_running_loop()
     while True:
-        req, fut = CAPTURE_QUEUE.get()
+        # Drain whatever is already queued so one transaction (and one fsync) covers the batch.
+        batch = [await CAPTURE_QUEUE.get()]
+        while len(batch) < CAPTURE_BATCH_SIZE:
+            try:
+                batch.append(CAPTURE_QUEUE.get_nowait())
+            except asyncio.QueueEmpty:
+                break
         try:
-            body, status = _process_capture(req)
-            fut.set_result((body, status))
-        except Exception as exc:  # Propagate any error back to the waiting request.
-            fut.set_exception(exc)
+            outcomes = await loop.run_in_executor(
+                WRITER_EXECUTOR, _process_capture_batch, [req for req, _ in batch]
+            )
+            for (_, fut), (result, exc) in zip(batch, outcomes):
+                _settle(fut, result, exc)
+        except Exception as exc:
+            for _, fut in batch:
+                _settle(fut, exc=exc)
         finally:
-            CAPTURE_QUEUE.task_done()
+            for _ in batch:
+                CAPTURE_QUEUE.task_done()
+
+
+def _process_capture_batch(reqs):
+    """Apply queued captures in one transaction; returns a (result, exc) pair per request."""
+    applied = []
+    try:
+        with write_conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for req in reqs:
+                try:
+                    applied.append((req, _apply_capture(conn, req), None))
+                except HTTPException as exc:
+                    # Rejections leave no writes behind, so the rest of the batch is unaffected.
+                    applied.append((req, None, exc))
+            conn.commit()
+    except Exception:
+        # Something failed mid-batch; retry each item on its own so one bad capture
+        # doesn't fail the others.
+        pokedex_logger.exception("Capture batch of %d failed; retrying individually", len(reqs))
+        outcomes = []
+        for req in reqs:
+            try:
+                outcomes.append((_process_capture(req), None))
+            except Exception as exc:  # Propagate any error back to the waiting request.
+                outcomes.append((None, exc))
+        return outcomes
+
+    # Only report results (and update the cache) once the batch is durable.
+    outcomes = []
+    for req, result, exc in applied:
+        if exc is None:
+            body, status, stored_shiny = result
+            _remember_capture(req, stored_shiny)
+            result = (body, status)
+        outcomes.append((result, exc))
+    return outcomes
 
 
 def _process_capture(req: CaptureReq):
+    with write_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        body, status, stored_shiny = _apply_capture(conn, req)
+        conn.commit()
+    _remember_capture(req, stored_shiny)
+    return body, status
+
+
+def _remember_capture(req: CaptureReq, shiny: Optional[int]):
+    if shiny is None:
+        return
+    with CAPTURE_CACHE_LOCK:
+        species = CAPTURE_CACHE.get(req.steam_id)
+        if species is None:
+            CAPTURE_CACHE[req.steam_id] = {req.pokemon_name: shiny}
+        else:
+            species[req.pokemon_name] = shiny
+
+
+def _apply_capture(conn, req: CaptureReq):
+    """Apply one capture on an open transaction; the caller commits.
+
+    Returns (body, status, stored_shiny), where stored_shiny is the row's shiny state
+    afterwards, or None if nothing is stored for this capture.
+    """
     # Ignore Mega and Gmax forms completely.
-    name_lower = req.pokemon_name.lower()
-    if name_lower.startswith("mega ") or name_lower.startswith("gmax "):
-        return {"ok": True, "ignored": True, "reason": "mega-gmax-not-tracked"}, 200
+    if req.pokemon_name[:5].casefold() in UNTRACKED_PREFIXES:
+        return {"ok": True, "ignored": True, "reason": "mega-gmax-not-tracked"}, 200, None
 
     # Log it.
     pokedex_logger.info(
-        f"{req.steam_id} captured {req.pokemon_name} {'[shiny]' if req.shiny else ''}"
+        "%s captured %s %s", req.steam_id, req.pokemon_name, "[shiny]" if req.shiny else ""
     )
 
-    # Get the current time.
-    if req.captured_at is None:
-        req.captured_at = datetime.now(timezone.utc).isoformat()
-
-    with WRITE_LOCK:
-        conn = db(); cur = conn.cursor()
-        cur.execute("SELECT 1 FROM players WHERE steam_id=?", (req.steam_id,))
-        if not cur.fetchone():
-            conn.close()
-            raise HTTPException(status_code=400, detail="Player not registered")
-
-        # If this capture already exists (and isn’t a shiny upgrade), short-circuit.
-        cur.execute(
-            "SELECT shiny FROM captures WHERE steam_id=? AND pokemon_name=?",
-            (req.steam_id, req.pokemon_name),
-        )
-        existing = cur.fetchone()
-        if existing and (existing["shiny"] == 1 or not req.shiny):
-            conn.close()
-            return {
-                "ok": True,
-                "inserted": False,
-                "shiny_upgraded": False,
-                "first_overall": False,
-                "first_shiny": False,
-            }, 200
-
-        # Snapshot counts before any writes to compute "first" flags.
-        cur.execute(
-            """
-            SELECT
-              COUNT(DISTINCT steam_id) AS total_players,
-              SUM(CASE WHEN shiny = 1 THEN 1 ELSE 0 END) AS shiny_rows
-            FROM captures
-            WHERE pokemon_name = ?
-            """,
-            (req.pokemon_name,),
-        )
-        pre_counts = cur.fetchone()
-        pre_total_players = pre_counts["total_players"] or 0
-        pre_shiny = pre_counts["shiny_rows"] or 0
+    cur = conn.cursor()
 
-        # Insert if not present; ignore if already exists
+    # If this capture already exists (and isn’t a shiny upgrade), short-circuit.
+    cur.execute(
+        SQL_CAPTURE_EXISTS,
+        (req.steam_id, req.pokemon_name),
+    )
+    existing = cur.fetchone()
+    if existing and (existing["shiny"] == 1 or not req.shiny):
+        return DUPLICATE_CAPTURE_BODY, 200, existing["shiny"]
+
+    # Snapshot counts before any writes to compute "first" flags, skipping the ones an
+    # existing row already rules out (an upgrade is never first_overall).
+    pre_total_players = None
+    if existing is None:
+        pre_total_players = cur.execute(SQL_SPECIES_PLAYER_COUNT, (req.pokemon_name,)).fetchone()[0]
+    pre_shiny = None
+    if req.shiny:
+        pre_shiny = cur.execute(SQL_SPECIES_SHINY_COUNT, (req.pokemon_name,)).fetchone()[0]
+
+    # Past the duplicate check this either inserts a new row or upgrades a non-shiny one.
+    # Unknown players are rejected by the captures -> players foreign key; the failed
+    # statement is rolled back on its own, leaving the rest of the transaction intact.
+    try:
         cur.execute(
-            """
-            INSERT OR IGNORE INTO captures(steam_id, pokemon_name, shiny, captured_at)
-            VALUES(?,?,?,?)
-            """,
+            SQL_CAPTURE_UPSERT,
             (req.steam_id, req.pokemon_name, 1 if req.shiny else 0, req.captured_at),
         )
-        inserted = cur.rowcount > 0
-
-        shiny_upgraded = False
-        # If this is a shiny capture, upgrade any existing non-shiny row to shiny
-        if req.shiny:
-            cur.execute(
-                """
-                UPDATE captures
-                SET shiny = 1
-                WHERE steam_id = ? AND pokemon_name = ? AND shiny = 0
-                """,
-                (req.steam_id, req.pokemon_name),
-            )
-            shiny_upgraded = cur.rowcount > 0
-            if shiny_upgraded:
-                pokedex_logger.info(
-                    "Shiny upgrade for %s -> %s", req.steam_id, req.pokemon_name
-                )
-        conn.commit()
-        conn.close()
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Player not registered")
+    changed = cur.rowcount > 0
+    inserted = changed and existing is None
+    shiny_upgraded = changed and existing is not None
+    if inserted:
+        cur.execute(SQL_TOTALS_ADD, (req.steam_id, 1, 1 if req.shiny else 0, 1))
+    elif shiny_upgraded:
+        cur.execute(SQL_TOTALS_ADD, (req.steam_id, 0, 1, 0))
+        pokedex_logger.info(
+            "Shiny upgrade for %s -> %s", req.steam_id, req.pokemon_name
+        )
 
     status = 201 if inserted or shiny_upgraded else 200
     first_overall = inserted and pre_total_players == 0
@@ -355,22 +819,36 @@ def _process_capture(req: CaptureReq):
         "first_overall": first_overall,
         "first_shiny": first_shiny,
     }
-    return body, status
+    stored_shiny = 1 if shiny_upgraded or req.shiny else 0
+    return body, status, stored_shiny
 
 class UncaptureReq(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     steam_id: str
     pokemon_name: str = Field(..., min_length=1, max_length=64)
 
-@app.get("/health")
+# Liveness probes hit /health several times a second; serve one prebuilt body and skip the access log.
+HEALTH_PATH = "/health"
+_HEALTH_RESP = ORJSONResponse({"ok": True})
+
+@app.get(HEALTH_PATH)
 def health():
-    return {"ok": True}
+    return _HEALTH_RESP
+
+@app.get("/health/pool")
+def health_pool():
+    """Report the pooled SQLite connections and how many checkouts they have served."""
+    with _POOL_LOCK:
+        stats = dict(_POOL_STATS)
+    return {"ok": True, **stats}
 
 @app.post("/v1/register")
-def register(req: RegisterReq):
-    fut: Future = Future()
+async def register(req: RegisterReq):
+    fut = None if REGISTER_IMMEDIATE_ACK else asyncio.get_running_loop().create_future()
     try:
         REGISTER_QUEUE.put_nowait((req, fut))
-    except Full:
+    except asyncio.QueueFull:
         raise HTTPException(
             status_code=429,
             detail="Register queue is full; try again shortly.",
@@ -378,58 +856,41 @@ def register(req: RegisterReq):
 
     if REGISTER_IMMEDIATE_ACK:
         # Return quickly and let the worker process the request.
-        return JSONResponse(content={"ok": True, "queued": True}, status_code=202)
+        return ORJSONResponse({"ok": True, "queued": True}, status_code=202)
 
     try:
-        body, status = fut.result(timeout=REGISTER_PROCESS_TIMEOUT)
-        return JSONResponse(content=body, status_code=status)
-    except TimeoutError:
+        body, status = await asyncio.wait_for(fut, REGISTER_PROCESS_TIMEOUT)
+    except asyncio.TimeoutError:
         raise HTTPException(
             status_code=503,
             detail="Registration is queued but still processing; please retry.",
         )
-    except Exception as exc:
-        if isinstance(exc, HTTPException):
-            raise exc
-        raise
+    return ORJSONResponse(body, status_code=status)
 
 @app.post("/v1/capture")
-def capture(req: CaptureReq):
-    name_lower = req.pokemon_name.lower()
-    if name_lower.startswith("mega ") or name_lower.startswith("gmax "):
-        return {"ok": True, "ignored": True, "reason": "mega-gmax-not-tracked"}
+async def capture(req: CaptureReq):
+    if req.pokemon_name[:5].casefold() in UNTRACKED_PREFIXES:
+        return ORJSONResponse({"ok": True, "ignored": True, "reason": "mega-gmax-not-tracked"})
+
+    # Captures we already know about are answered from the cache. Anything else goes to
+    # the worker, which also detects duplicates and answers them with the same body.
+    # If a writer holds the lock, skip the cache rather than block the loop; the worker
+    # still recognises duplicates.
+    known_shiny = None
+    if CAPTURE_CACHE_LOCK.acquire(blocking=False):
+        try:
+            species = CAPTURE_CACHE.get(req.steam_id)
+            if species is not None:
+                known_shiny = species.get(req.pokemon_name)
+        finally:
+            CAPTURE_CACHE_LOCK.release()
+    if known_shiny is not None and (known_shiny == 1 or not req.shiny):
+        return ORJSONResponse(DUPLICATE_CAPTURE_BODY, status_code=200)
 
-    # Fast path: if this capture already exists (and isn't a shiny upgrade), return immediately.
-    try:
-        conn = db(); cur = conn.cursor()
-        cur.execute(
-            "SELECT shiny FROM captures WHERE steam_id=? AND pokemon_name=?",
-            (req.steam_id, req.pokemon_name),
-        )
-        row = cur.fetchone()
-        conn.close()
-        if row:
-            already_shiny = row["shiny"] == 1
-            if already_shiny or not req.shiny:
-                return JSONResponse(
-                    content={
-                        "ok": True,
-                        "inserted": False,
-                        "shiny_upgraded": False,
-                        "first_overall": False,
-                        "first_shiny": False,
-                    },
-                    status_code=200,
-                )
-            # else: fall through to queue for shiny upgrade
-    except sqlite3.OperationalError:
-        # If DB is momentarily busy, fall back to queue processing.
-        pass
-
-    fut: Future = Future()
+    fut = None if CAPTURE_IMMEDIATE_ACK else asyncio.get_running_loop().create_future()
     try:
         CAPTURE_QUEUE.put_nowait((req, fut))
-    except Full:
+    except asyncio.QueueFull:
         raise HTTPException(
             status_code=429,
             detail="Capture queue is full; try again shortly.",
@@ -437,296 +898,268 @@ def capture(req: CaptureReq):
 
     if CAPTURE_IMMEDIATE_ACK:
         # Return quickly and let the worker process the request.
-        return JSONResponse(content={"ok": True, "queued": True}, status_code=202)
+        return ORJSONResponse({"ok": True, "queued": True}, status_code=202)
 
     try:
-        body, status = fut.result(timeout=CAPTURE_PROCESS_TIMEOUT)
-        return JSONResponse(content=body, status_code=status)
-    except TimeoutError:
+        body, status = await asyncio.wait_for(fut, CAPTURE_PROCESS_TIMEOUT)
+    except asyncio.TimeoutError:
         raise HTTPException(
             status_code=503,
             detail="Capture is queued but still processing; please retry.",
         )
-    except Exception as exc:
-        if isinstance(exc, HTTPException):
-            raise exc
-        raise
+    return ORJSONResponse(body, status_code=status)
+
+@app.post("/v1/capture/bulk")
+async def capture_bulk(req: CaptureBulkReq):
+    """Import many captures in one transaction (no per-capture "first" flags)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(WRITER_EXECUTOR, _process_capture_bulk, req)
+
+def _process_capture_bulk(req: CaptureBulkReq):
+    rows = []
+    for c in req.captures:
+        if c.pokemon_name[:5].casefold() in UNTRACKED_PREFIXES:
+            continue
+        rows.append((c.steam_id, c.pokemon_name, 1 if c.shiny else 0, c.captured_at))
+    steam_ids = {(r[0],) for r in rows}
+    pokedex_logger.info("Bulk capture of %d for %d players", len(rows), len(steam_ids))
+
+    with write_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.cursor()
+        try:
+            cur.executemany(SQL_CAPTURE_UPSERT, rows)
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Player not registered")
+        changed = cur.rowcount
+        # Cheaper to recount the touched players than to track deltas per row.
+        cur.executemany(SQL_TOTALS_REFRESH, steam_ids)
+        conn.commit()
+
+    return ORJSONResponse({
+        "ok": True,
+        "received": len(req.captures),
+        "ignored": len(req.captures) - len(rows),
+        "changed": changed,
+    })
 
 @app.post("/v1/uncapture")
-def uncapture(req: UncaptureReq):
+async def uncapture(req: UncaptureReq):
     """Remove a capture for a player (ignores shiny flag)."""
-    pokedex_logger.info(f"Uncapturing {req.pokemon_name} for {req.steam_id}")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(WRITER_EXECUTOR, _process_uncapture, req)
+
+def _process_uncapture(req: UncaptureReq):
+    pokedex_logger.info("Uncapturing %s for %s", req.pokemon_name, req.steam_id)
 
-    with WRITE_LOCK:
-        conn = db(); cur = conn.cursor()
-        cur.execute("SELECT 1 FROM players WHERE steam_id=?", (req.steam_id,))
+    with write_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.cursor()
+        cur.execute(SQL_PLAYER_EXISTS, (req.steam_id,))
         if not cur.fetchone():
-            conn.close()
             raise HTTPException(status_code=400, detail="Player not registered")
 
         cur.execute(
-            "DELETE FROM captures WHERE steam_id = ? AND pokemon_name = ?",
+            SQL_CAPTURE_DELETE,
             (req.steam_id, req.pokemon_name),
         )
-        deleted = cur.rowcount
+        removed = cur.fetchone()
+        deleted = 1 if removed else 0
+        if removed:
+            # Legacy Mega/Gmax rows never counted towards unique species.
+            tracked = req.pokemon_name[:5].casefold() not in UNTRACKED_PREFIXES
+            cur.execute(
+                SQL_TOTALS_ADD,
+                (req.steam_id, -1, -1 if removed["shiny"] == 1 else 0, -1 if tracked else 0),
+            )
         conn.commit()
-        conn.close()
 
-    return {"ok": True, "deleted": deleted}
+    with CAPTURE_CACHE_LOCK:
+        species = CAPTURE_CACHE.get(req.steam_id)
+        if species is not None:
+            species.pop(req.pokemon_name, None)
+
+    return ORJSONResponse({"ok": True, "deleted": deleted})
+
+async def _run_read(fn, *args):
+    """Run a blocking read on READ_EXECUTOR, which has one thread per pooled read connection."""
+    return await asyncio.get_running_loop().run_in_executor(READ_EXECUTOR, fn, *args)
 
 @app.get("/v1/dex/{steam_id}")
-def dex(steam_id: str):
+async def dex(steam_id: str):
+    return await _run_read(_read_dex, steam_id)
+
+def _read_dex(steam_id: str):
     # Log it.
-    pokedex_logger.info(f"Getting dex for {steam_id}")
+    pokedex_logger.info("Getting dex for %s", steam_id)
 
-    conn = db(); cur = conn.cursor()
-    cur.execute("SELECT steam_name, steam_name_safe FROM players WHERE steam_id=?", (steam_id,))
-    row = cur.fetchone()
-    steam_name = row["steam_name"] if row else None
-    steam_name_safe = row["steam_name_safe"] if row else None
-    cur.execute("""
-      SELECT pokemon_name, shiny, captured_at
-      FROM captures WHERE steam_id=?
-      ORDER BY pokemon_name COLLATE NOCASE
-    """, (steam_id,))
-    caps = [dict(r) for r in cur.fetchall()]
-    conn.close()
+    with read_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(SQL_PLAYER_NAMES, (steam_id,))
+        steam_name, steam_name_safe = cur.fetchone() or (None, None)
+        rows = cur.execute(SQL_PLAYER_CAPTURES, (steam_id,)).fetchall()
 
-    return {
+    return ORJSONResponse({
         "steam_id": steam_id,
         "steam_name": steam_name,
         "steam_name_safe": steam_name_safe or steam_name,
-        "count": len(caps),
-        "shiny_count": sum(1 for c in caps if c["shiny"]),
-        "captures": caps
-    }
+        # Counted off the rows themselves so they always agree with the captures list;
+        # player_totals is read by a separate statement and may be a commit ahead.
+        "count": len(rows),
+        "shiny_count": sum(1 for r in rows if r[1]),
+        "captures": [dict(zip(CAPTURE_COLUMNS, r)) for r in rows],
+    })
 
 @app.get("/v1/leaderboard")
-def leaderboard(limit: int = 50):
+async def leaderboard(limit: int = 50):
+    return await _run_read(_read_leaderboard, limit)
+
+def _read_leaderboard(limit: int):
     # Log it.
-    pokedex_logger.info(f"Getting leaderboard")
+    pokedex_logger.info("Getting leaderboard")
 
-    conn = db(); cur = conn.cursor()
-    cur.execute("""
-      SELECT p.steam_id, p.steam_name, p.steam_name_safe,
-             COUNT(c.id) AS total,
-             SUM(CASE WHEN c.shiny=1 THEN 1 ELSE 0 END) AS shinies
-      FROM players p
-      LEFT JOIN captures c ON p.steam_id = c.steam_id
-      GROUP BY p.steam_id
-      ORDER BY total DESC, shinies DESC, p.steam_name COLLATE NOCASE
-      LIMIT ?
-    """, (limit,))
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
+    with read_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(SQL_LEADERBOARD, (limit,))
+        rows = [dict(zip(LEADERBOARD_COLUMNS, r)) for r in cur.fetchall()]
 
-    return {"entries": rows}
+    return ORJSONResponse({"entries": rows})
 
 @app.get("/v1/player/search")
-def search_player(query: str = Query(..., min_length=1, max_length=64)):
+async def search_player(query: str = Query(..., min_length=1, max_length=64)):
     """Lookup a player by Steam ID or (sanitized) name and return captures plus rank."""
+    return await _run_read(_read_search_player, query)
+
+def _read_search_player(query: str):
     q = query.strip()
     if not q:
         raise HTTPException(status_code=400, detail="Query is required")
 
     like = f"%{q}%"
-    conn = db()
-    cur = conn.cursor()
+    with read_conn() as conn:
+        cur = conn.cursor()
 
-    # Grab the player with totals first.
-    cur.execute(
-        """
-        SELECT p.steam_id,
-               p.steam_name,
-               p.steam_name_safe,
-               COUNT(c.id) AS total,
-               SUM(CASE WHEN c.shiny = 1 THEN 1 ELSE 0 END) AS shinies
-        FROM players p
-        LEFT JOIN captures c ON p.steam_id = c.steam_id
-        WHERE p.steam_id = ?
-           OR p.steam_name_safe LIKE ?
-        GROUP BY p.steam_id
-        ORDER BY total DESC, shinies DESC, p.steam_name COLLATE NOCASE
-        LIMIT 1
-        """,
-        (q, like),
-    )
-    player = cur.fetchone()
-    if not player:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Player not found")
+        # Grab the player with totals first.
+        cur.execute(
+            SQL_PLAYER_SEARCH,
+            (q, like),
+        )
+        player = cur.fetchone()
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
 
-    steam_id = player["steam_id"]
-    safe_name = player["steam_name_safe"] or player["steam_name"] or "Unknown"
-    total_captures = player["total"] or 0
-    shinies = player["shinies"] or 0
+        steam_id, steam_name, steam_name_safe, total_captures, shinies = player
+        safe_name = steam_name_safe or steam_name or "Unknown"
+        total_captures = total_captures or 0
+        shinies = shinies or 0
 
-    # Compute rank using the same ordering rules as the leaderboard.
-    cur.execute(
-        """
-        SELECT
-          1 + COUNT(*) AS rank
-        FROM (
-          SELECT
-            p.steam_id,
-            COUNT(c.id) AS total,
-            SUM(CASE WHEN c.shiny = 1 THEN 1 ELSE 0 END) AS shinies,
-            COALESCE(p.steam_name_safe, p.steam_name, 'Unknown') AS name_key
-          FROM players p
-          LEFT JOIN captures c ON p.steam_id = c.steam_id
-          GROUP BY p.steam_id
-        ) lb
-        WHERE lb.total > ?
-           OR (lb.total = ? AND lb.shinies > ?)
-           OR (lb.total = ? AND lb.shinies = ? AND lb.name_key COLLATE NOCASE < ?)
-        """,
-        (
-            total_captures,
-            total_captures,
-            shinies,
-            total_captures,
-            shinies,
-            safe_name,
-        ),
-    )
-    rank_row = cur.fetchone()
-    rank = rank_row["rank"] if rank_row else 1
+        # Compute rank using the same ordering rules as the leaderboard.
+        cur.execute(
+            SQL_PLAYER_RANK,
+            (
+                total_captures,
+                total_captures,
+                shinies,
+                total_captures,
+                shinies,
+                safe_name,
+            ),
+        )
+        rank_row = cur.fetchone()
+        rank = rank_row[0] if rank_row else 1
 
-    # Fetch captures for display.
-    cur.execute(
-        """
-        SELECT pokemon_name, shiny, captured_at
-        FROM captures
-        WHERE steam_id = ?
-        ORDER BY pokemon_name COLLATE NOCASE
-        """,
-        (steam_id,),
-    )
-    captures = [dict(r) for r in cur.fetchall()]
-    conn.close()
+        # Fetch captures for display.
+        cur.execute(
+            SQL_PLAYER_CAPTURES,
+            (steam_id,),
+        )
+        captures = [dict(zip(CAPTURE_COLUMNS, r)) for r in cur.fetchall()]
 
-    return {
+    return ORJSONResponse({
         "steam_id": steam_id,
-        "steam_name": player["steam_name"],
-        "steam_name_safe": player["steam_name_safe"],
+        "steam_name": steam_name,
+        "steam_name_safe": steam_name_safe,
         "total": total_captures,
         "shinies": shinies,
         "rank": rank,
         "captures": captures,
-    }
+    })
 
 @app.get("/v1/species/{pokemon_name}/caught")
-def caught_count(pokemon_name: str):
-    pokedex_logger.info(f"Getting caught count for {pokemon_name}")
+async def caught_count(pokemon_name: str):
+    return await _run_read(_read_caught_count, pokemon_name)
 
-    conn = db()
-    cur = conn.cursor()
+def _read_caught_count(pokemon_name: str):
+    pokedex_logger.info("Getting caught count for %s", pokemon_name)
 
-    cur.execute(
-        """
-        SELECT
-          COUNT(*) AS total_players,
-          SUM(CASE WHEN shiny = 1 THEN 1 ELSE 0 END) AS shiny_players
-        FROM captures
-        WHERE pokemon_name = ?
-        """,
-        (pokemon_name,),
-    )
+    with read_conn() as conn:
+        cur = conn.cursor()
 
-    row = cur.fetchone()
-
-    cur.execute(
-        """
-        SELECT
-          c.steam_id,
-          p.steam_name,
-          p.steam_name_safe,
-          c.captured_at
-        FROM captures c
-        JOIN players p ON p.steam_id = c.steam_id
-        WHERE c.pokemon_name = ?
-        ORDER BY c.captured_at ASC
-        LIMIT 1
-        """,
-        (pokemon_name,),
-    )
-    first_row = cur.fetchone()
-    conn.close()
+        total_players = cur.execute(SQL_SPECIES_PLAYER_COUNT, (pokemon_name,)).fetchone()[0]
+        shiny_players = cur.execute(SQL_SPECIES_SHINY_COUNT, (pokemon_name,)).fetchone()[0]
 
-    total_players = row["total_players"] or 0
-    shiny_players = row["shiny_players"] or 0
+        cur.execute(
+            SQL_SPECIES_FIRST_CAPTURE,
+            (pokemon_name,),
+        )
+        first_id, first_name, first_name_safe, first_at = cur.fetchone() or (None, None, None, None)
 
-    return {
+    return ORJSONResponse({
         "pokemon_name": pokemon_name,
         "total_players": total_players,
         "shiny_players": shiny_players,
-        "first_caught_by_id": first_row["steam_id"] if first_row else None,
-        "first_caught_by_name": first_row["steam_name"] if first_row else None,
-        "first_caught_by_name_safe": first_row["steam_name_safe"] if first_row else None,
-        "first_caught_at": first_row["captured_at"] if first_row else None,
-    }
+        "first_caught_by_id": first_id,
+        "first_caught_by_name": first_name,
+        "first_caught_by_name_safe": first_name_safe,
+        "first_caught_at": first_at,
+    })
 
 @app.get("/v1/species/search")
-def search_species(term: str = Query("", max_length=64), limit: int = 15):
+async def search_species(term: str = Query("", max_length=64), limit: int = 15):
     """Autocomplete for Pokémon names seen in captures only."""
+    return await _run_read(_read_search_species, term, limit)
+
+def _read_search_species(term: str, limit: int):
     term = term.strip()
     pattern = f"%{term}%" if term else "%"
-    conn = db()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT DISTINCT pokemon_name
-        FROM captures
-        WHERE pokemon_name LIKE ?
-        ORDER BY pokemon_name COLLATE NOCASE
-        LIMIT ?
-        """,
-        (pattern, limit),
-    )
-    names = [r["pokemon_name"] for r in cur.fetchall()]
-    conn.close()
-    return {"names": names}
+    with read_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            SQL_SPECIES_SEARCH,
+            (pattern, limit),
+        )
+        names = [r[0] for r in cur.fetchall()]
+    return ORJSONResponse({"names": names})
 
 @app.get("/v1/leaderboard/completion")
-def leaderboard_completion(limit: int = 15):
-    conn = db(); cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT p.steam_id,
-               p.steam_name,
-               p.steam_name_safe,
-               COUNT(DISTINCT c.pokemon_name) AS unique_species
-        FROM players p
-        LEFT JOIN captures c
-          ON p.steam_id = c.steam_id
-         AND c.pokemon_name NOT LIKE 'Mega %%'
-         AND c.pokemon_name NOT LIKE 'Gmax %%'
-        GROUP BY p.steam_id
-        HAVING unique_species > 0
-        ORDER BY unique_species DESC, p.steam_name COLLATE NOCASE
-        LIMIT ?
-        """,
-        (limit,),
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
+async def leaderboard_completion(limit: int = 15):
+    return await _run_read(_read_leaderboard_completion, limit)
+
+def _read_leaderboard_completion(limit: int):
+    with read_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            SQL_LEADERBOARD_COMPLETION,
+            (limit,),
+        )
+        rows = [dict(zip(COMPLETION_COLUMNS, r)) for r in cur.fetchall()]
 
     for r in rows:
         r["max_species"] = MAX_SPECIES_COUNT
         r["completion_ratio"] = (r["unique_species"] or 0) / MAX_SPECIES_COUNT if MAX_SPECIES_COUNT > 0 else 0.0
 
-    return {
+    return ORJSONResponse({
         "max_species": MAX_SPECIES_COUNT,
         "entries": rows,
-    }
+    })
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start = time.time()
-    method = request.method
-    path = request.url.path
-    ua = request.headers.get("user-agent", "-")
-    client_ip = request.client.host if request.client else "-"
+    if request.scope["path"] == HEALTH_PATH:
+        return await call_next(request)
+
+    start = time.perf_counter_ns()
+    ua_raw = next((v for k, v in request.scope["headers"] if k == b"user-agent"), None)
 
     try:
         response = await call_next(request)
@@ -736,25 +1169,32 @@ async def log_requests(request: Request, call_next):
         pokedex_logger.exception("Unhandled exception during request")
         raise
     finally:
-        duration_ms = (time.time() - start) * 1000.0
-        pokedex_logger.info(
-            "%s %s %d %.2fms UA=%s",
-            method,
-            path,
-            status,
-            duration_ms,
-            ua,
-        )
+        # Whole microseconds, logged as milliseconds with two decimals using integer math only.
+        duration_us = (time.perf_counter_ns() - start) // 1000
+        ms, frac = divmod(duration_us, 1000)
+        # Only build the path and UA strings when the access line will actually be emitted.
+        if pokedex_logger.isEnabledFor(logging.INFO):
+            pokedex_logger.info(
+                "%s %s %d %d.%02dms UA=%s",
+                request.method,
+                request.url.path,
+                status,
+                ms,
+                frac // 10,
+                ua_raw.decode("latin-1") if ua_raw is not None else "-",
+            )
 
         # Detect admin user agent and log to dedicated audit file without blocking the request.
-        if ua and ua.strip().lower() == ADMIN_USER_AGENT.strip().lower():
+        if ua_raw and ua_raw.strip().lower() == ADMIN_UA_BYTES:
+            client_ip = request.client.host if request.client else "-"
             admin_audit_logger.info(
-                "ADMIN UA %s %s?%s %d %.2fms ip=%s",
-                method,
-                path,
+                "ADMIN UA %s %s?%s %d %d.%02dms ip=%s",
+                request.method,
+                request.url.path,
                 request.url.query or "",
                 status,
-                duration_ms,
+                ms,
+                frac // 10,
                 client_ip,
             )
 
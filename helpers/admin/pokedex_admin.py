@@ -11,6 +11,8 @@ from datetime import datetime
 
 import requests
 from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 """
 PMTU Pokédex Admin Helper
@@ -74,6 +76,10 @@ ADMIN_USER_AGENT = os.environ.get("POKEDEX_ADMIN_UA", "PMTU-Pokedex-Admin")
 # Shared HTTP session to carry admin User-Agent on every request.
 HTTP: Session = requests.Session()
 HTTP.headers.update({"User-Agent": ADMIN_USER_AGENT})
+# Keep connections alive and retry transient connection failures (idempotent methods only).
+_HTTP_ADAPTER = HTTPAdapter(pool_maxsize=4, max_retries=Retry(total=3, backoff_factor=0.2))
+HTTP.mount("http://", _HTTP_ADAPTER)
+HTTP.mount("https://", _HTTP_ADAPTER)
 
 # Performs an HTTP GET to the API health endpoint.
 def api_health(api_base):
@@ -253,9 +259,17 @@ def db_delete_player(db_path, steam_id):
         print(f"No player found with steam_id={steam_id}")
         conn.close()
         return
-    cur.execute("DELETE FROM captures WHERE steam_id=?", (steam_id,))
-    cur.execute("DELETE FROM players WHERE steam_id=?", (steam_id,))
-    conn.commit()
+    # One transaction, so a failure can't leave a player behind with half their data.
+    with conn:
+        cur.execute("DELETE FROM captures WHERE steam_id=?", (steam_id,))
+        cur.execute("DELETE FROM player_totals WHERE steam_id=?", (steam_id,))
+        cur.execute("DELETE FROM players WHERE steam_id=?", (steam_id,))
+    # A large player can skew the planner statistics; refresh them for the touched tables,
+    # sampling like the server does at startup.
+    cur.execute("PRAGMA analysis_limit=1000;")
+    cur.execute("ANALYZE players;")
+    cur.execute("ANALYZE captures;")
+    cur.execute("ANALYZE player_totals;")
     conn.close()
     print(f"Deleted player {steam_id} and all captures")
 
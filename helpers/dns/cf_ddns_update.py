@@ -6,13 +6,22 @@ import json
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 CONFIG_PATH = os.environ.get("CF_DDNS_CONFIG", "../configs/cf_ddns_config.json")
+# Last IP every record was confirmed at; lets unchanged runs skip Cloudflare entirely.
+STATE_PATH = os.environ.get("CF_DDNS_STATE", CONFIG_PATH + ".state.json")
+# Re-check the records at least this often even if the IP hasn't changed.
+STATE_MAX_AGE_SEC = int(os.environ.get("CF_DDNS_STATE_MAX_AGE_SEC", "86400"))
 IP_CHECK_URL = "https://ifconfig.me/ip"
 CF_API_BASE = "https://api.cloudflare.com/client/v4"
+# Records are checked and updated concurrently; stays within the session's pool size.
+MAX_WORKERS = 8
 
 
 def log(msg):
@@ -28,6 +37,22 @@ def load_config():
         return json.load(f)
 
 
+def load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(ip):
+    # Write then rename, so a crash never leaves a truncated state file behind.
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"current_ip": ip, "checked_at": int(time.time())}, f)
+    os.replace(tmp_path, STATE_PATH)
+
+
 def get_public_ip():
     resp = requests.get(IP_CHECK_URL, timeout=5)
     resp.raise_for_status()
@@ -36,9 +61,25 @@ def get_public_ip():
     return ip
 
 
-def get_record(zone_id, record_id, headers):
+def make_session(api_token):
+    # One keep-alive pool for every Cloudflare call, so only the first pays the TLS handshake.
+    sess = requests.Session()
+    sess.headers.update({
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json",
+    })
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    )
+    sess.mount("https://", adapter)
+    return sess
+
+
+def get_record(zone_id, record_id, sess):
     url = f"{CF_API_BASE}/zones/{zone_id}/dns_records/{record_id}"
-    resp = requests.get(url, headers=headers, timeout=10)
+    resp = sess.get(url, timeout=10)
     if not resp.ok:
         log(f"ERROR: unable to fetch DNS record {record_id}: {resp.status_code} {resp.text}")
         return None
@@ -49,7 +90,7 @@ def get_record(zone_id, record_id, headers):
     return data["result"]
 
 
-def update_record(zone_id, record, new_ip, headers):
+def update_record(zone_id, record, new_ip, sess):
     record_id = record["id"]
     name = record["name"]
 
@@ -63,7 +104,7 @@ def update_record(zone_id, record, new_ip, headers):
         "proxied": record.get("proxied", False),
     }
 
-    resp = requests.put(url, headers=headers, json=payload, timeout=10)
+    resp = sess.put(url, json=payload, timeout=10)
     if not resp.ok:
         log(f"ERROR: failed to update record {name} ({record_id}): {resp.status_code} {resp.text}")
         return False
@@ -77,16 +118,30 @@ def update_record(zone_id, record, new_ip, headers):
     return True
 
 
+def process_record(zone_id, rec, current_ip, sess):
+    # Get the existing record details
+    existing = get_record(zone_id, rec["id"], sess)
+    if not existing:
+        return False
+
+    old_ip = existing.get("content")
+    name = existing.get("name")
+
+    if old_ip == current_ip:
+        log(f"No change for {name} (still {old_ip})")
+        return True
+
+    # Update the record
+    return update_record(zone_id, existing, current_ip, sess)
+
+
 def main():
     cfg = load_config()
     api_token = cfg["api_token"]
     zone_id = cfg["zone_id"]
     records = cfg["records"]
 
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json",
-    }
+    sess = make_session(api_token)
 
     try:
         current_ip = get_public_ip()
@@ -94,22 +149,28 @@ def main():
         log(f"ERROR: cannot detect public IP: {e}")
         return 1
 
-    for rec in records:
-        # Get the existing record details
-        rec_id = rec["id"]
-        existing = get_record(zone_id, rec_id, headers)
-        if not existing:
-            continue
-
-        old_ip = existing.get("content")
-        name = existing.get("name")
-
-        if old_ip == current_ip:
-            log(f"No change for {name} (still {old_ip})")
-            continue
-
-        # Update the record
-        update_record(zone_id, existing, current_ip, headers)
+    state = load_state()
+    if (
+        state.get("current_ip") == current_ip
+        and time.time() - state.get("checked_at", 0) < STATE_MAX_AGE_SEC
+    ):
+        log(f"No change in public IP ({current_ip}), skipping record checks")
+        return 0
+
+    # One GET (and PUT if needed) per record, fanned out over the shared session.
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(records)))) as pool:
+        results = list(pool.map(lambda rec: process_record(zone_id, rec, current_ip, sess), records))
+
+    for rec, ok in zip(records, results):
+        if not ok:
+            log(f"Record {rec['id']} was not updated")
+
+    # Only remember the IP once every record is confirmed to point at it.
+    if all(results):
+        try:
+            save_state(current_ip)
+        except OSError as e:
+            log(f"WARNING: cannot write state file {STATE_PATH}: {e}")
 
     return 0
 